@@ -1,11 +1,16 @@
 
-import os, sys, json, re
+import os, sys, json, re, hashlib
 from datetime import date
 from dateutil.relativedelta import relativedelta
 
 import pandas as pd
 import streamlit as st
 
+from src.cache.bitmap import BitmapCache, evaluate_predicates
+from src.jobs.ui import run_job, start_job, poll_job, clear_result
+from src.ingest.reader import read_header, read_table
+from src.dsl.lists import get_list, load_list, require_list
+
 # ---------- Utilities ----------
 
 def simple_number_from_text(txt: str):
@@ -37,7 +42,51 @@ def guess_bool_series(s: pd.Series):
         return None
     return s.map(_to_bool)
 
-def weighted_sample(ids, weights, k, seed=None):
+# 임직원/테스트 플래그 칼럼 추정용 키워드
+EMP_COL_KEYS = ["employee","임직원","직원"]
+TEST_COL_KEYS = ["test","테스트"]
+
+def _first_col(columns, keys):
+    for c in columns:
+        if any(k in normalize_str(c) for k in keys):
+            return c
+    return None
+
+def guess_columns(sample: pd.DataFrame):
+    # 칼럼명 + 앞부분 샘플 값으로 ID/가중치/날짜/카테고리/숫자 칼럼 추정 (칼럼 투영 전에 호출)
+    cols = list(sample.columns)
+    guesses = {
+        'id': _first_col(cols, ["user_id","userid","고객id","회원id","고객번호","회원번호"]) or _first_col(cols, ["id"]),
+        'weight': _first_col(cols, ["weight","가중"]),
+        'date': _first_col(cols, ["date","dt","일자","날짜","일시","created","updated"]),
+        'category': _first_col(cols, ["region","지역","category","카테고리","segment","시도"]),
+        'numeric': _first_col(cols, ["amount","금액","거래액","score","점수"]),
+    }
+    if guesses['date'] is None:
+        for c in cols:
+            if pd.api.types.is_numeric_dtype(sample[c]) or pd.api.types.is_bool_dtype(sample[c]):
+                continue
+            if pd.to_datetime(sample[c], errors='coerce').notna().mean() >= 0.8:
+                guesses['date'] = c
+                break
+    if guesses['numeric'] is None:
+        nums = [c for c in sample.select_dtypes(include='number').columns if c not in guesses.values()]
+        guesses['numeric'] = nums[0] if nums else None
+    return guesses
+
+def needed_columns(header, cols):
+    # 조건 해석에 쓰는 칼럼(ID/가중치/날짜/카테고리/숫자)과 임직원/테스트 플래그 칼럼만 로드.
+    # 조건문 내용과 무관하게 유지해 조건을 고칠 때마다 파일을 다시 읽지 않도록 한다
+    need = {c for c in cols if c and c in header}
+    need |= {c for c in header if any(k in normalize_str(c) for k in EMP_COL_KEYS + TEST_COL_KEYS)}
+    return [c for c in header if c in need]
+
+def text_columns(header, nl: str, loaded):
+    # 조건문에 칼럼명이 들어 있으면 단일 칼럼 조건 파서가 쓸 수 있으므로, 아직 안 읽은 칼럼만 골라낸다
+    txt = normalize_str(nl or '')
+    return [c for c in header if c not in loaded and normalize_str(c) and normalize_str(c) in txt]
+
+def weighted_sample(ids, weights, k, seed=None, progress=None):
     # 간단한 비복원 가중 샘플 (작은 데이터 기준)
     import random
     rng = random.Random(seed) if seed is not None else random.Random()
@@ -51,6 +100,8 @@ def weighted_sample(ids, weights, k, seed=None):
             # 균등
             idx = rng.randrange(len(cand))
             chosen.append(cand.pop(idx)[0])
+            if progress:
+                progress(len(chosen), k)
             continue
         r = rng.random() * total
         s = 0.0
@@ -60,58 +111,139 @@ def weighted_sample(ids, weights, k, seed=None):
                 chosen.append(i)
                 cand.pop(j)
                 break
+        if progress:
+            progress(len(chosen), k)
     return chosen
 
-def filter_dataframe(df: pd.DataFrame, nl: str, user_opts):
-    cand = df.copy()
+def filter_dataframe(df: pd.DataFrame, nl: str, user_opts, cache: BitmapCache | None = None, dataset: str | None = None,
+                     progress=None):
     txt = nl or ''
+    # 조건 하나 = 전체 테이블 기준 마스크. 키에 파라미터를 모두 넣어 조건이 바뀐 것만 다시 계산
+    preds = {}
 
     # 1) 임직원/테스트 제외 (칼럼 추정)
     if any(k in txt for k in ["임직원 제외","직원 제외","사원 제외"]):
         # employee-like column guess
-        emp_cols = [c for c in df.columns if any(k in normalize_str(c) for k in ["employee","임직원","직원"])]
+        emp_cols = [c for c in df.columns if any(k in normalize_str(c) for k in EMP_COL_KEYS)]
         if emp_cols:
-            s = guess_bool_series(df[emp_cols[0]])
-            cand = cand[(s==False) | (s.isna())]
+            def _not_emp(d, c=emp_cols[0]):
+                s = guess_bool_series(d[c])
+                return (s==False) | (s.isna())
+            preds[('exclude_true', emp_cols[0])] = _not_emp
 
     if any(k in txt for k in ["테스트 제외","테스트계정 제외","QA 제외"]):
-        test_cols = [c for c in df.columns if any(k in normalize_str(c) for k in ["test","테스트"])]
+        test_cols = [c for c in df.columns if any(k in normalize_str(c) for k in TEST_COL_KEYS)]
         if test_cols:
-            s = guess_bool_series(df[test_cols[0]])
-            cand = cand[(s==False) | (s.isna())]
+            def _not_test(d, c=test_cols[0]):
+                s = guess_bool_series(d[c])
+                return (s==False) | (s.isna())
+            preds[('exclude_true', test_cols[0])] = _not_test
 
     # 2) 최근 N일 (날짜 칼럼 선택)
     ndays = extract_recent_days(txt)
     dt_col = user_opts.get('date_col')
-    if ndays and dt_col and dt_col in cand.columns:
+    if ndays and dt_col and dt_col in df.columns:
         since = (pd.Timestamp.today().normalize() - pd.Timedelta(days=int(ndays)))
-        cand = cand[pd.to_datetime(cand[dt_col], errors='coerce') >= since]
+        preds[('since', dt_col, since.isoformat())] = lambda d, c=dt_col, t=since: pd.to_datetime(d[c], errors='coerce') >= t
 
     # 3) 지역/카테고리 (텍스트 토큰이 값에 포함되면 매칭) - 지정된 카테고리 칼럼 대상
     cat_col = user_opts.get('category_col')
-    if cat_col and cat_col in cand.columns:
+    if cat_col and cat_col in df.columns:
         # 수많은 단어 중 '서울','경기','부산','인천','대구','대전','광주' 등 기본 토큰을 찾음
         tokens = re.findall(r"[가-힣A-Za-z0-9]+", txt)
         targets = set([t for t in tokens if t in ["서울","경기","부산","인천","대구","대전","광주"]])
         if targets:
-            cand = cand[cand[cat_col].astype(str).isin(targets)]
+            preds[('isin', cat_col, tuple(sorted(targets)))] = lambda d, c=cat_col, t=targets: d[c].astype(str).isin(t)
 
     # 4) 숫자 조건: "<컬럼명 유사어> N(만원) 이상/이하/초과/미만"
     num_col = user_opts.get('numeric_col')
-    if num_col and num_col in cand.columns:
+    if num_col and num_col in df.columns:
         num = simple_number_from_text(txt)
         if num is not None:
+            op = None
             if "이상" in txt or "크거나 같" in txt:
-                cand = cand[pd.to_numeric(cand[num_col], errors='coerce') >= num]
+                op = '>='
             elif "이하" in txt or "작거나 같" in txt:
-                cand = cand[pd.to_numeric(cand[num_col], errors='coerce') <= num]
+                op = '<='
             elif "초과" in txt:
-                cand = cand[pd.to_numeric(cand[num_col], errors='coerce') > num]
+                op = '>'
             elif "미만" in txt:
-                cand = cand[pd.to_numeric(cand[num_col], errors='coerce') < num]
-
+                op = '<'
+            if op:
+                def _num(d, c=num_col, op=op, num=num):
+                    v = pd.to_numeric(d[c], errors='coerce')
+                    return {'>=': v >= num, '<=': v <= num, '>': v > num, '<': v < num}[op]
+                preds[('cmp', num_col, op, num)] = _num
+
+    # 5) 대상/제외 명단: ID 칼럼 기준 semi-join / anti-join (정렬된 코드 배열 searchsorted)
+    id_col = user_opts.get('id_col')
+    if id_col and id_col in df.columns:
+        # 지정한 명단이 레지스트리에서 밀려났으면 조용히 건너뛰지 않고 오류 (명단 없이 추첨되는 것 방지)
+        inc = require_list(user_opts['include_list']) if user_opts.get('include_list') else None
+        exc = require_list(user_opts['exclude_list']) if user_opts.get('exclude_list') else None
+        if inc is not None:
+            preds[('in_list', id_col, inc.handle)] = lambda d, c=id_col, l=inc: l.mask(d[c])
+        if exc is not None:
+            preds[('not_in_list', id_col, exc.handle)] = lambda d, c=id_col, l=exc: ~l.mask(d[c])
+
+    if not preds:
+        return df.copy()
+    # 캐시는 세션 간 공유되고 칼럼 dtype은 세션 입력(투영/dtypes)에 따라 달라지므로 키에 dtype을 포함
+    preds = {key + (str(df[key[1]].dtype),): fn for key, fn in preds.items()}
+    return df[evaluate_predicates(df, preds, cache=cache, dataset=dataset, progress=progress)]
+
+def apply_condition(cand: pd.DataFrame, cond) -> pd.DataFrame:
+    # 단일 칼럼 임계치/동등 조건 파서 결과 적용
+    if not (cond.get('col') and cond.get('op')):
+        return cand
+    col = cond['col']
+    if cond['op'] == '==':
+        return cand[cand[col].astype(str) == str(cond['value'])]
+    val = pd.to_numeric(cand[col], errors='coerce')
+    if cond['op'] == '>=':
+        return cand[val >= float(cond['value'])]
+    elif cond['op'] == '>':
+        return cand[val > float(cond['value'])]
+    elif cond['op'] == '<=':
+        return cand[val <= float(cond['value'])]
+    elif cond['op'] == '<':
+        return cand[val < float(cond['value'])]
     return cand
 
+def build_candidates(df: pd.DataFrame, nl: str, user_opts, cache=None, dataset=None, progress=None):
+    # 1) 기존 룰 기반 필터 (기간/임직원/테스트/지역 토큰/숫자 조건/명단) 2) 단일 칼럼 조건 파서
+    cand = filter_dataframe(df, nl, user_opts, cache=cache, dataset=dataset, progress=progress)
+    return apply_condition(cand, parse_condition(nl, df.columns))
+
+def direct_draw(df: pd.DataFrame, nl: str, user_opts, id_col: str, k: int, seed=None, cand=None,
+                cache=None, dataset=None, progress=None):
+    if cand is None:
+        cand = build_candidates(df, nl, user_opts, cache=cache, dataset=dataset, progress=progress)
+    if cand.empty:
+        return cand, []
+    ids = cand[id_col].astype(str).tolist()
+    weights = [1.0]*len(cand)  # 균등 추첨
+    return cand, weighted_sample(ids, weights, k, seed=seed, progress=progress)
+
+def list_handle(stage: str, upload):
+    # 명단 파일은 공유 워커 풀에서 파싱/등록하고, 같은 파일이면 rerun 때 핸들을 재사용
+    if upload is None:
+        clear_result(stage)
+        return None
+    data = upload.getvalue()
+    key = hashlib.sha256(data).hexdigest()
+    handle = run_job(stage, key, load_list, data, upload.name)
+    if handle is not None and get_list(handle) is None:
+        # 저장소 예산 초과로 제거된 명단이면 다시 등록
+        clear_result(stage)
+        handle = run_job(stage, key, load_list, data, upload.name)
+    return handle
+
+@st.cache_resource
+def get_bitmap_cache() -> BitmapCache:
+    # 세션 간 공유. 메모리 예산은 CHOOCHUM_BITMAP_CACHE_MB (기본 64MB), 초과 시 LRU 제거
+    return BitmapCache(max_bytes=int(os.environ.get('CHOOCHUM_BITMAP_CACHE_MB', '64')) * 1024 * 1024)
+
 st.set_page_config(page_title='Choochum – 업로드 기반 추첨', layout='wide')
 st.title('📥 업로드한 엑셀/CSV에서 자연어 조건으로 가중치 추첨')
 
@@ -128,6 +260,10 @@ with st.sidebar:
     date_col = st.text_input('날짜 칼럼명 (예: txn_dt, created_at)', value='')
     category_col = st.text_input('카테고리/지역 칼럼명 (예: region)', value='')
     numeric_col = st.text_input('숫자 조건 칼럼명 (예: amount, score)', value='')
+    include_up = st.file_uploader('대상 명단 (선택, 첫 칼럼=ID)', type=['xlsx','csv'], key='include_up')
+    exclude_up = st.file_uploader('제외 명단 (선택, 첫 칼럼=ID)', type=['xlsx','csv'], key='exclude_up')
+    include_list = list_handle('대상 명단 읽기', include_up)
+    exclude_list = list_handle('제외 명단 읽기', exclude_up)
 
     st.header('4) 자연어 조건')
     nl_text = st.text_area('예: 서울/경기, 최근 30일, 임직원 제외; 거래액 10만원 이상', height=120)
@@ -137,72 +273,83 @@ with st.sidebar:
     seed_in = st.text_input('seed (선택, 숫자)', placeholder='예: 42 (비워두면 매번 랜덤)', help='seed는 난수의 시작값입니다. 같은 후보군+같은 seed면 결과가 동일하게 재현됩니다.')
 
 if up is not None:
-    # Load
-    if up.name.lower().endswith('.xlsx'):
-        df = pd.read_excel(up)
-    else:
-        df = pd.read_csv(up)
-    st.subheader('업로드 미리보기')
-    st.write(f'행: {len(df)}, 열: {len(df.columns)}')
-    st.dataframe(df.head(20))
+    # Load: 헤더 + 앞부분 샘플로 칼럼을 자동 감지한 뒤, 필요한 칼럼만 공유 워커 풀에서 로드
+    data = up.getvalue()
+    dataset_key = hashlib.sha256(data).hexdigest()
+    header = read_header(data, up.name)
+    sample = read_table(data, up.name, nrows=200)
 
     # Show detected columns
-
-# Fuzzy guess columns
-guesses = guess_columns(df)
-st.info(f"자동 감지 결과 → ID: {guesses.get('id')}, Weight: {guesses.get('weight')}, Date: {guesses.get('date')}, Category: {guesses.get('category')}, Numeric: {guesses.get('numeric')}")
-
-# If inputs are empty or not found, use guesses
-if (not id_col) or (id_col not in df.columns and guesses.get('id')):
-    id_col = guesses.get('id') or id_col
-if (not weight_col) or (weight_col not in df.columns and guesses.get('weight')):
-    weight_col = guesses.get('weight') or weight_col
-if (not date_col) or (date_col not in df.columns and guesses.get('date')):
-    date_col = guesses.get('date') or date_col
-if (not category_col) or (category_col not in df.columns and guesses.get('category')):
-    category_col = guesses.get('category') or category_col
-if (not numeric_col) or (numeric_col not in df.columns and guesses.get('numeric')):
-    numeric_col = guesses.get('numeric') or numeric_col
+    # Fuzzy guess columns
+    guesses = guess_columns(sample)
+    st.info(f"자동 감지 결과 → ID: {guesses.get('id')}, Weight: {guesses.get('weight')}, Date: {guesses.get('date')}, Category: {guesses.get('category')}, Numeric: {guesses.get('numeric')}")
+
+    # If inputs are empty or not found, use guesses
+    if (not id_col) or (id_col not in header and guesses.get('id')):
+        id_col = guesses.get('id') or id_col
+    if (not weight_col) or (weight_col not in header and guesses.get('weight')):
+        weight_col = guesses.get('weight') or weight_col
+    if (not date_col) or (date_col not in header and guesses.get('date')):
+        date_col = guesses.get('date') or date_col
+    if (not category_col) or (category_col not in header and guesses.get('category')):
+        category_col = guesses.get('category') or category_col
+    if (not numeric_col) or (numeric_col not in header and guesses.get('numeric')):
+        numeric_col = guesses.get('numeric') or numeric_col
+
+    # 기본 로드는 파일만으로 정해지는 칼럼(자동 감지 + 임직원/테스트 플래그)이라 칼럼 입력을 고쳐도 다시 읽지 않는다
+    base = needed_columns(header, list(guesses.values()))
+    base_dtypes = {c: str for c in [guesses.get('id'), guesses.get('category')] if c in base}
+    df = run_job('파일 읽기', dataset_key, read_table, data, up.name, usecols=base, dtypes=base_dtypes)
+    if df is None:
+        st.stop()
+    # 직접 지정한 칼럼과 조건문이 참조하는 칼럼 중 기본 로드에 없는 것만 따로 읽어 붙인다
+    picked = {c for c in [id_col, weight_col, date_col, category_col, numeric_col] if c and c in header} - set(base)
+    wanted = picked | set(text_columns(header, nl_text, set(base) | picked))
+    extra = [c for c in header if c in wanted]
+    if extra:
+        dtypes = {c: str for c in [id_col, category_col] if c in extra}
+        more = run_job('칼럼 추가 읽기', (dataset_key, tuple(extra), tuple(sorted(dtypes))), read_table,
+                       data, up.name, usecols=extra, dtypes=dtypes)
+        if more is None:
+            st.stop()
+        df = pd.concat([df, more], axis=1)
+    st.subheader('업로드 미리보기')
+    st.write(f'행: {len(df)}, 열: {len(header)} (로드 {len(df.columns)})')
+    st.dataframe(df.head(20))
 
     st.caption('칼럼 예시: ' + ', '.join(map(str, df.columns[:10])) + (' ...' if len(df.columns) > 10 else ''))
 
-    # Buttons
+    filter_opts = {
+        'date_col': date_col if date_col in df.columns else None,
+        'category_col': category_col if category_col in df.columns else None,
+        'numeric_col': numeric_col if numeric_col in df.columns else None,
+        'id_col': id_col, 'include_list': include_list, 'exclude_list': exclude_list,
+    }
+    seed_val = int(seed_in) if seed_in.strip().isdigit() else None
+    cond = parse_condition(nl_text, df.columns)
+    k_eff = int(cond.get('sample_n') or k)
+
+    # Buttons (작업은 클릭할 때만 제출, 결과는 한 번 받아 그린 뒤 작업 목록에서 제거)
     col_a, col_b = st.columns(2)
     with col_a:
         if st.button('조건 해석 & 후보군 보기'):
             if id_col not in df.columns:
                 st.error(f'ID 칼럼 "{id_col}" 을(를) 찾을 수 없습니다. 실제 칼럼명을 확인해 주세요.')
             else:
-                
-# 1) 기존 룰 기반 필터 (기간/임직원/테스트/지역 토큰/숫자 조건)
-cand = filter_dataframe(df, nl_text, {
-    'date_col': date_col if date_col in df.columns else None,
-    'category_col': category_col if category_col in df.columns else None,
-    'numeric_col': numeric_col if numeric_col in df.columns else None,
-})
-# 2) 단일 칼럼 임계치/동등 조건 파서 적용
-cond = parse_condition(nl_text, df.columns)
-if cond.get('col') and cond.get('op'):
-    col = cond['col']
-    if cond['op'] == '==':
-        cand = cand[cand[col].astype(str) == str(cond['value'])]
-    else:
-        val = pd.to_numeric(cand[col], errors='coerce')
-        if cond['op'] == '>=': cand = cand[val >= float(cond['value'])]
-        elif cond['op'] == '>': cand = cand[val > float(cond['value'])]
-        elif cond['op'] == '<=': cand = cand[val <= float(cond['value'])]
-        elif cond['op'] == '<': cand = cand[val < float(cond['value'])]
-st.caption(f"해석 결과: 컬럼={cond.get('col')}, 연산={cond.get('op')}, 값={cond.get('value')}, 추첨인원={cond.get('sample_n')}")
-
-                st.session_state['cand_df'] = cand
-                st.session_state['id_col'] = id_col
-                st.session_state['weight_col'] = None
-
-                st.write(f'후보군 수: {len(cand)}')
-                preview_cols = [c for c in [id_col, weight_col, category_col, numeric_col, date_col] if c in cand.columns]
-                if not preview_cols:
-                    preview_cols = list(cand.columns)[:6]
-                st.dataframe(cand[preview_cols].head(200))
+                start_job('후보군 필터', build_candidates, df, nl_text, filter_opts,
+                          cache=get_bitmap_cache(), dataset=dataset_key)
+        cand = poll_job('후보군 필터')
+        if cand is not None:
+            st.caption(f"해석 결과: 컬럼={cond.get('col')}, 연산={cond.get('op')}, 값={cond.get('value')}, 추첨인원={cond.get('sample_n')}")
+            st.session_state['cand_df'] = cand
+            st.session_state['id_col'] = id_col
+            st.session_state['weight_col'] = None
+
+            st.write(f'후보군 수: {len(cand)}')
+            preview_cols = [c for c in [id_col, weight_col, category_col, numeric_col, date_col] if c in cand.columns]
+            if not preview_cols:
+                preview_cols = list(cand.columns)[:6]
+            st.dataframe(cand[preview_cols].head(200))
 
     with col_b:
         if st.button('추첨'):
@@ -211,63 +358,36 @@ st.caption(f"해석 결과: 컬럼={cond.get('col')}, 연산={cond.get('op')}, 
                 st.warning('먼저 "조건 해석 & 후보군 보기"를 눌러 후보군을 생성하세요.')
             else:
                 idc = st.session_state.get('id_col')
-                wc = st.session_state.get('weight_col')
                 ids = cand[idc].astype(str).tolist()
                 weights = [1.0]*len(cand)  # v4: 균등 추첨
-                seed_val = int(seed_in) if seed_in.strip().isdigit() else None
-                cond = parse_condition(nl_text, df.columns)
-                k_eff = int(cond.get('sample_n') or k)
-                winners = weighted_sample(ids, weights, int(k_eff), seed=seed_val)
-                out = pd.DataFrame({idc: winners})
-                st.subheader('당첨자')
-                st.dataframe(out)
-                st.download_button('CSV 다운로드', data=out.to_csv(index=False).encode('utf-8-sig'),
-                                   file_name='winners.csv', mime='text/csv')
+                start_job('추첨', weighted_sample, ids, weights, int(k_eff), seed=seed_val)
+        winners = poll_job('추첨')
+        if winners is not None:
+            out = pd.DataFrame({st.session_state.get('id_col'): winners})
+            st.subheader('당첨자')
+            st.dataframe(out)
+            st.download_button('CSV 다운로드', data=out.to_csv(index=False).encode('utf-8-sig'),
+                               file_name='winners.csv', mime='text/csv')
 
     # 메인 영역 하단에 '추첨 실행' 버튼을 항상 제공 (후보군 미생성 시 즉시 생성 후 진행)
     st.markdown('---')
     st.subheader('🎯 추첨 실행')
     st.caption('먼저 위에서 조건을 해석해 후보군을 확인하는 것을 권장하지만, 바로 추첨도 가능합니다.')
 
-    
-if st.button('🎯 추첨 실행 (바로 진행)'):
-    # seed 유효성 검사
-    if seed_in.strip() and not seed_in.strip().isdigit():
-        st.error('seed는 숫자만 입력하세요. 예: 42  (비우면 매 실행마다 다른 결과입니다)')
-    else:
-        # 후보군 준비: 세션에 없으면 즉시 생성
-        cand = st.session_state.get('cand_df')
-        if cand is None:
-            if id_col not in df.columns:
-                st.error(f'ID 칼럼 "{id_col}" 을(를) 찾을 수 없습니다. 먼저 올바른 ID 칼럼명을 입력하세요.')
-            else:
-                cand = filter_dataframe(df, nl_text, {
-                    'date_col': date_col if date_col in df.columns else None,
-                    'category_col': category_col if category_col in df.columns else None,
-                    'numeric_col': numeric_col if numeric_col in df.columns else None,
-                })
-                cond = parse_condition(nl_text, df.columns)
-                if cond.get('col') and cond.get('op'):
-                    col = cond['col']
-                    if cond['op'] == '==':
-                        cand = cand[cand[col].astype(str) == str(cond['value'])]
-                    else:
-                        val = pd.to_numeric(cand[col], errors='coerce')
-                        if cond['op'] == '>=':
-                            cand = cand[val >= float(cond['value'])]
-                        elif cond['op'] == '>':
-                            cand = cand[val > float(cond['value'])]
-                        elif cond['op'] == '<=':
-                            cand = cand[val <= float(cond['value'])]
-                        elif cond['op'] == '<':
-                            cand = cand[val < float(cond['value'])]
+    if st.button('🎯 추첨 실행 (바로 진행)'):
+        # seed 유효성 검사
+        if seed_in.strip() and not seed_in.strip().isdigit():
+            st.error('seed는 숫자만 입력하세요. 예: 42  (비우면 매 실행마다 다른 결과입니다)')
+        elif st.session_state.get('cand_df') is None and id_col not in df.columns:
+            st.error(f'ID 칼럼 "{id_col}" 을(를) 찾을 수 없습니다. 먼저 올바른 ID 칼럼명을 입력하세요.')
+        else:
+            # 후보군 준비: 세션에 없으면 같은 작업 안에서 즉시 생성
+            start_job('바로 추첨', direct_draw, df, nl_text, filter_opts, id_col, int(k_eff), seed_val,
+                      cand=st.session_state.get('cand_df'), cache=get_bitmap_cache(), dataset=dataset_key)
+    result = poll_job('바로 추첨')
+    if result is not None:
+        cand, winners = result
         if cand is not None and not cand.empty:
-            ids = cand[id_col].astype(str).tolist()
-            weights = [1.0]*len(cand)  # 균등 추첨
-            seed_val = int(seed_in) if seed_in.strip().isdigit() else None
-            cond = parse_condition(nl_text, df.columns)
-            k_eff = int(cond.get('sample_n') or k)
-            winners = weighted_sample(ids, weights, int(k_eff), seed=seed_val)
             out = pd.DataFrame({id_col: winners})
             st.success(f'추첨 완료! (후보군 {len(cand)}명, 당첨 {len(out)}명)')
             st.dataframe(out)
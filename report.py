@@ -4,9 +4,12 @@ import matplotlib.pyplot as plt
 import pdfplumber
 import io
 import zipfile
+import hashlib
 from pptx import Presentation
 from pptx.util import Inches
 from datetime import datetime
+from src.jobs.ui import run_job, start_job, poll_job
+from src.ingest.reader import read_tables, sheet_names
 st.title(":짠: 이벤트 결과보고서 자동생성 프로그램")
 # 여러 파일 업로드 허용
 uploaded_files = st.file_uploader(
@@ -19,8 +22,7 @@ def _fig_to_png_bytes(fig) -> bytes:
     fig.savefig(buf, format="png", bbox_inches="tight")
     plt.close(fig)
     return buf.getvalue()
-def analyze_excel(file, file_name):
-    df = pd.read_excel(file)
+def analyze_excel(df, file_name):
     st.subheader(f":막대_차트: {file_name} 분석 결과")
     # 기본 통계 요약
     st.write(":흰색_확인_표시: 데이터 요약")
@@ -60,13 +62,15 @@ def analyze_pdf(file, file_name):
             text += page_text + "\n"
     st.text_area(":책갈피_탭: 추출된 텍스트", text, height=200)
     return text, []  # PDF 차트 없음
-def make_ppt_report(title: str, all_charts: dict) -> bytes:
+def make_ppt_report(title: str, all_charts: dict, progress=None) -> bytes:
     prs = Presentation()
     # 제목
     slide = prs.slides.add_slide(prs.slide_layouts[0])
     slide.shapes.title.text = title
     slide.placeholders[1].text = f"자동 생성 · {datetime.now().strftime('%Y-%m-%d %H:%M')}"
     # 차트 슬라이드
+    total = sum(len(v) for v in all_charts.values())
+    done = 0
     for dataset_name, charts in all_charts.items():
         s = prs.slides.add_slide(prs.slide_layouts[5])
         s.shapes.title.text = f":포장: {dataset_name}"
@@ -75,16 +79,22 @@ def make_ppt_report(title: str, all_charts: dict) -> bytes:
             slide.shapes.title.text = chart_title
             left = Inches(1); top = Inches(1.2); width = Inches(8)
             slide.shapes.add_picture(io.BytesIO(png_bytes), left, top, width=width)
+            done += 1
+            if progress:
+                progress(done, total, "PPT")
     out = io.BytesIO()
     prs.save(out)
     return out.getvalue()
-def make_excel_with_images(all_dfs, all_charts) -> bytes:
+def make_excel_with_images(all_dfs, all_charts, progress=None) -> bytes:
     """
     Data 시트 + Charts 시트(이미지 삽입) 형태로 엑셀 저장.
     - all_dfs: [DataFrame, ...]  (Data_1, Data_2 ...)
     - all_charts: {"파일명": [(title, png_bytes), ...], ...}
+    - progress: (done, total, message) 콜백 (선택, 시트/이미지 단위)
     """
     out = io.BytesIO()
+    total = len(all_dfs) + sum(len(v) for v in all_charts.values())
+    done = 0
     # :경고: 이미지 삽입을 위해 engine='xlsxwriter' 사용
     with pd.ExcelWriter(out, engine="xlsxwriter") as writer:
         # 1) 데이터 시트 저장
@@ -96,6 +106,9 @@ def make_excel_with_images(all_dfs, all_charts) -> bytes:
             for col_idx, col in enumerate(df.columns):
                 max_len = max([len(str(col))] + [len(str(x)) for x in df[col].head(100).astype(str).tolist()])
                 ws.set_column(col_idx, col_idx, min(max_len + 2, 40))
+            done += 1
+            if progress:
+                progress(done, total, "Excel")
         # 2) 차트 시트 (이미지 삽입)
         chart_ws = writer.book.add_worksheet("Charts")
         row = 0
@@ -127,6 +140,9 @@ def make_excel_with_images(all_dfs, all_charts) -> bytes:
                     "chart.png",  # 더미 파일명(필수), 실제로는 image_data 사용
                     {"image_data": io.BytesIO(png_bytes), "x_scale": 1.0, "y_scale": 1.0}
                 )
+                done += 1
+                if progress:
+                    progress(done, total, "Excel")
                 # 다음 이미지로 이동
                 idx_in_row += 1
                 if idx_in_row % per_row == 0:
@@ -141,20 +157,43 @@ def make_excel_with_images(all_dfs, all_charts) -> bytes:
             c = 1
             idx_in_row = 0
     return out.getvalue()
+def build_report_files(all_dfs, all_charts, progress=None):
+    excel_bytes = make_excel_with_images(all_dfs, all_charts, progress=progress)
+    ppt_bytes = None
+    if any(len(v) > 0 for v in all_charts.values()):
+        ppt_bytes = make_ppt_report("이벤트 결과 보고서 :반짝임:", all_charts, progress=progress)
+    return excel_bytes, ppt_bytes
 if uploaded_files:
     all_dfs = []           # [DataFrame, ...]
     all_texts = []         # [str, ...]
     all_charts = {}        # { "파일명": [(title, png_bytes), ...] }
+    # 엑셀 읽기는 공유 워커 풀에서 (read-only 스트리밍, 파일/시트별 병렬. 같은 파일 묶음이면 rerun 때 재사용)
+    excel_files = [(f.name, f.getvalue()) for f in uploaded_files if f.name.endswith(("xlsx", "xls"))]
+    excel_sheets = {name: sheet_names(data, name) for name, data in excel_files}
+    excel_sources = [(name, data, sheet) for name, data in excel_files for sheet in excel_sheets[name]]
+    files_key = tuple((name, hashlib.sha256(data).hexdigest()) for name, data in excel_files)
+    excel_dfs = run_job("엑셀 읽기", files_key, read_tables, excel_sources) if excel_files else {}
+    if excel_dfs is None:
+        st.stop()
     for file in uploaded_files:
         file_name = file.name
         if file_name.endswith(("xlsx", "xls")):
-            df, charts = analyze_excel(file, file_name)
-            all_dfs.append(df)
-            all_charts[file_name] = charts
+            sheets = excel_sheets[file_name]
+            for sheet in sheets:
+                # 시트가 여러 개면 "파일명 · 시트명"으로 구분
+                ds_name = file_name if len(sheets) == 1 else f"{file_name} · {sheet}"
+                df, charts = analyze_excel(excel_dfs[(file_name, sheet)], ds_name)
+                all_dfs.append(df)
+                all_charts[ds_name] = charts
         elif file_name.endswith("pdf"):
             text, charts = analyze_pdf(file, file_name)
             all_texts.append(text)
     if st.button(":받은_편지함_트레이: 결과 보고서 생성"):
+        # 2) Excel (데이터 + Charts 시트에 이미지 삽입) / 3) PPT 는 워커 풀에서 생성
+        start_job("보고서 생성", build_report_files, all_dfs, all_charts)
+    built = poll_job("보고서 생성")
+    if built is not None:
+        excel_with_imgs, ppt_bytes = built
         # 1) Markdown (표/텍스트)
         md_content = "# :다트: 이벤트 결과 보고서\n\n"
         md_content += ":반짝임: 자동 생성된 요약 리포트입니다.\n\n"
@@ -170,15 +209,13 @@ if uploaded_files:
             file_name="event_report.md"
         )
         # 2) Excel (데이터 + Charts 시트에 이미지 삽입)
-        excel_with_imgs = make_excel_with_images(all_dfs, all_charts)
         st.download_button(
             ":막대_차트: Excel 보고서(차트 내장) 다운로드",
             data=excel_with_imgs,
             file_name="event_report_with_charts.xlsx"
         )
         # 3) PPT (차트 포함)
-        if any(len(v) > 0 for v in all_charts.values()):
-            ppt_bytes = make_ppt_report("이벤트 결과 보고서 :반짝임:", all_charts)
+        if ppt_bytes is not None:
             st.download_button(
                 ":영사기: PPT 보고서(차트 포함) 다운로드",
                 data=ppt_bytes,
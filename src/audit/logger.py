@@ -5,7 +5,7 @@ def snapshot_hash(user_ids):
     j = json.dumps(sorted(list(user_ids)), ensure_ascii=False)
     return hashlib.sha256(j.encode()).hexdigest()
 
-def write_audit(event_id, seed, dsl_json, sql, snapshot_hash_value, outdir='runs'):
+def write_audit(event_id, seed, dsl_json, sql, snapshot_hash_value, outdir='runs', quotas=None):
     os.makedirs(outdir, exist_ok=True)
     rec = {
         'event_id': event_id,
@@ -15,6 +15,14 @@ def write_audit(event_id, seed, dsl_json, sql, snapshot_hash_value, outdir='runs
         'snapshot_hash': snapshot_hash_value,
         'ts': int(time.time())
     }
+    if quotas is not None:
+        # 층별 추첨 (weighted_draw.quota_summary): 요청 인원/상한과 실제 층별 당첨 인원
+        rec['quotas'] = {
+            'by': quotas['by'],
+            'cap': quotas.get('cap'),
+            'requested': {str(k): int(v) for k, v in quotas.get('requested', {}).items()},
+            'actual': {str(k): int(v) for k, v in quotas.get('actual', {}).items()},
+        }
     path = os.path.join(outdir, f'audit_{rec["ts"]}.json')
     with open(path, 'w', encoding='utf-8') as f:
         json.dump(rec, f, ensure_ascii=False, indent=2)
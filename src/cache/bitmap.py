@@ -0,0 +1,104 @@
+from __future__ import annotations
+import hashlib, threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# 조건(predicate) 하나의 결과 = 전체 테이블 기준 bool 마스크.
+# 마스크는 np.packbits로 압축(행당 1bit)해서 (데이터셋 해시, predicate 키) 단위로 캐시한다.
+PredicateFn = Callable[[pd.DataFrame], "pd.Series | np.ndarray"]
+
+def frame_fingerprint(df: pd.DataFrame) -> str:
+    h = pd.util.hash_pandas_object(df, index=True).to_numpy()
+    cols = "\x1f".join(map(str, df.columns))
+    return hashlib.sha256(h.tobytes() + cols.encode("utf-8")).hexdigest()
+
+def _to_bool(mask, n: int) -> np.ndarray:
+    if isinstance(mask, pd.Series):
+        mask = mask.fillna(False).to_numpy(dtype=bool)
+    arr = np.asarray(mask, dtype=bool)
+    if arr.shape != (n,):
+        raise ValueError(f"predicate mask has shape {arr.shape}, expected ({n},)")
+    return arr
+
+class BitmapCache:
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = int(max_bytes)
+        self.hits = 0
+        self.misses = 0
+        self._nbytes = 0
+        self._store: "OrderedDict[Tuple[str, Hashable], np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    @property
+    def nbytes(self) -> int:
+        return self._nbytes
+
+    def get_packed(self, dataset: str, predicate: Hashable) -> Optional[np.ndarray]:
+        key = (dataset, predicate)
+        with self._lock:
+            packed = self._store.get(key)
+            if packed is None:
+                self.misses += 1
+                return None
+            self._store.move_to_end(key)
+            self.hits += 1
+            return packed
+
+    def put(self, dataset: str, predicate: Hashable, mask: np.ndarray) -> np.ndarray:
+        packed = np.packbits(np.asarray(mask, dtype=bool))
+        key = (dataset, predicate)
+        with self._lock:
+            old = self._store.pop(key, None)
+            if old is not None:
+                self._nbytes -= old.nbytes
+            if packed.nbytes > self.max_bytes:
+                return packed
+            # LRU: 예산을 넘으면 가장 오래 안 쓴 비트맵부터 제거
+            while self._store and self._nbytes + packed.nbytes > self.max_bytes:
+                _, evicted = self._store.popitem(last=False)
+                self._nbytes -= evicted.nbytes
+            self._store[key] = packed
+            self._nbytes += packed.nbytes
+        return packed
+
+    def mask(self, df: pd.DataFrame, dataset: str, predicate: Hashable, fn: PredicateFn) -> np.ndarray:
+        packed = self.get_packed(dataset, predicate)
+        if packed is None:
+            packed = self.put(dataset, predicate, _to_bool(fn(df), len(df)))
+        return np.unpackbits(packed, count=len(df)).astype(bool)
+
+    def combine(self, df: pd.DataFrame, dataset: str, predicates: Dict[Hashable, PredicateFn],
+                progress: Optional[Callable[[int, int], None]] = None) -> np.ndarray:
+        n = len(df)
+        acc = np.full((n + 7) // 8, 0xFF, dtype=np.uint8)
+        for i, (predicate, fn) in enumerate(predicates.items(), start=1):
+            packed = self.get_packed(dataset, predicate)
+            if packed is None:
+                packed = self.put(dataset, predicate, _to_bool(fn(df), n))
+            np.bitwise_and(acc, packed, out=acc)
+            if progress:
+                progress(i, len(predicates))
+        return np.unpackbits(acc, count=n).astype(bool)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._store.clear()
+            self._nbytes = 0
+
+def evaluate_predicates(df: pd.DataFrame, predicates: Dict[Hashable, PredicateFn],
+                        cache: Optional[BitmapCache] = None, dataset: Optional[str] = None,
+                        progress: Optional[Callable[[int, int], None]] = None) -> np.ndarray:
+    if cache is None:
+        mask = np.ones(len(df), dtype=bool)
+        for i, fn in enumerate(predicates.values(), start=1):
+            mask &= _to_bool(fn(df), len(df))
+            if progress:
+                progress(i, len(predicates))
+        return mask
+    return cache.combine(df, dataset or frame_fingerprint(df), predicates, progress=progress)
@@ -0,0 +1,159 @@
+from __future__ import annotations
+import hashlib, os, threading
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+# 대용량 대상/제외 명단. 한 번 등록하면 핸들("list:<digest>")로 QueryDSL에서 참조한다.
+# 정수 ID만 있으면 정렬된 int64, 아니면 정렬된 64bit 해시(uint64)로 보관하고 searchsorted로 멤버십 검사.
+HANDLE_PREFIX = "list:"
+HANDLE_RE = r"list:[0-9a-f]{16}"
+_INT_RE = r"-?(?:0|[1-9]\d{0,17})"
+
+def _clean(values) -> pd.Series:
+    s = pd.Series(values).dropna()
+    if pd.api.types.is_float_dtype(s):
+        # 결측이 섞인 정수 칼럼은 float로 읽히므로 정수 값이면 int64로 되돌린다 ("1.0" 문자열 해시 방지)
+        x = s.to_numpy(dtype=float)
+        if np.all(np.isfinite(x) & (x == np.floor(x)) & (np.abs(x) < 2.0 ** 63)):
+            return s.astype(np.int64)
+    return s if pd.api.types.is_integer_dtype(s) else s.astype(str).str.strip()
+
+def _hash(strings: pd.Series) -> np.ndarray:
+    # ID는 대부분 고유값이라 categorize(사전 factorize)는 오히려 느리다
+    return pd.util.hash_array(strings.to_numpy(dtype=object), categorize=False)
+
+def _isin_sorted(sorted_arr: np.ndarray, codes: np.ndarray) -> np.ndarray:
+    if len(sorted_arr) == 0:
+        return np.zeros(len(codes), dtype=bool)
+    idx = np.searchsorted(sorted_arr, codes).clip(max=len(sorted_arr) - 1)
+    return sorted_arr[idx] == codes
+
+class IdList:
+    def __init__(self, values: Iterable[Any], source: Optional[Callable[[], Iterable[Any]]] = None,
+                 source_nbytes: int = 0):
+        """source: 해시 명단의 원본 값을 다시 만드는 함수 (SQL 임시 테이블 적재 때만 호출).
+        원본 문자열 배열은 보관하지 않는다."""
+        s = _clean(values)
+        if pd.api.types.is_integer_dtype(s) or s.str.fullmatch(_INT_RE).all():
+            self.kind = "int"
+            self.codes = np.unique(s.astype(np.int64).to_numpy())
+            self._source = None
+        else:
+            self.kind = "hash"
+            self.codes = np.unique(_hash(s))
+            self._source = source
+        self.source_nbytes = source_nbytes if self._source is not None else 0
+        self.handle = HANDLE_PREFIX + hashlib.sha256(self.kind.encode() + self.codes.tobytes()).hexdigest()[:16]
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + self.source_nbytes
+
+    def values(self) -> np.ndarray:
+        if self.kind == "int":
+            return self.codes
+        if self._source is None:
+            raise ValueError(f"raw values of {self.handle} are not retained; register it with a source")
+        return np.unique(_clean(self._source()).to_numpy(dtype=object).astype(str))
+
+    def mask(self, series: pd.Series) -> np.ndarray:
+        if self.kind == "int":
+            if pd.api.types.is_integer_dtype(series) and not pd.api.types.is_extension_array_dtype(series):
+                return _isin_sorted(self.codes, series.to_numpy(dtype=np.int64))
+            if pd.api.types.is_float_dtype(series):
+                x = series.to_numpy(dtype=float)
+                valid = np.isfinite(x) & (x == np.floor(x))
+                return valid & _isin_sorted(self.codes, np.where(valid, x, 0).astype(np.int64))
+            s = series.astype(str).str.strip()
+            valid = (series.notna() & s.str.fullmatch(_INT_RE).fillna(False)).to_numpy(dtype=bool)
+            codes = np.zeros(len(series), dtype=np.int64)
+            codes[valid] = s[valid].astype(np.int64).to_numpy()
+            return valid & _isin_sorted(self.codes, codes)
+        # 명단 쪽 값만 strip 한다 (대상 테이블 ID는 그대로 비교)
+        valid = series.notna().to_numpy(dtype=bool)
+        return valid & _isin_sorted(self.codes, _hash(series.astype(str)))
+
+class ListRegistry:
+    # BitmapCache와 같은 방식: 바이트 예산을 넘으면 가장 오래 안 쓴 명단부터 제거
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = int(max_bytes)
+        self._nbytes = 0
+        self._store: "OrderedDict[str, IdList]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    @property
+    def nbytes(self) -> int:
+        return self._nbytes
+
+    def add(self, lst: IdList) -> str:
+        with self._lock:
+            old = self._store.get(lst.handle)
+            if old is not None:
+                self._store.move_to_end(lst.handle)
+                if old._source is not None or lst._source is None:
+                    return lst.handle
+                # 같은 명단이 원본(source) 없이 등록돼 있었으면 원본이 있는 쪽으로 교체
+                self._store.pop(lst.handle)
+                self._nbytes -= old.nbytes
+            # 명단 하나가 예산보다 크면 그 명단만 남긴다 (핸들은 항상 유효해야 하므로)
+            while self._store and self._nbytes + lst.nbytes > self.max_bytes:
+                _, evicted = self._store.popitem(last=False)
+                self._nbytes -= evicted.nbytes
+            self._store[lst.handle] = lst
+            self._nbytes += lst.nbytes
+        return lst.handle
+
+    def get(self, handle: str) -> Optional[IdList]:
+        with self._lock:
+            lst = self._store.get(handle)
+            if lst is not None:
+                self._store.move_to_end(handle)
+            return lst
+
+    def drop(self, handle: str) -> None:
+        with self._lock:
+            lst = self._store.pop(handle, None)
+            if lst is not None:
+                self._nbytes -= lst.nbytes
+
+# 프로세스 공유 명단 저장소. 예산은 CHOOCHUM_IDLIST_CACHE_MB (기본 256MB)
+_REGISTRY = ListRegistry(int(os.environ.get("CHOOCHUM_IDLIST_CACHE_MB", "256")) * 1024 * 1024)
+
+def register_list(values: Iterable[Any], source: Optional[Callable[[], Iterable[Any]]] = None,
+                  source_nbytes: int = 0) -> str:
+    return _REGISTRY.add(IdList(values, source=source, source_nbytes=source_nbytes))
+
+def load_list(data: bytes, name: str, column: Optional[str] = None, progress=None) -> str:
+    from src.ingest.reader import read_header, read_table
+    column = column or read_header(data, name)[0]
+    read = lambda: read_table(data, name, usecols=[column], dtypes={column: str})[column]
+    values = read_table(data, name, usecols=[column], dtypes={column: str}, progress=progress)[column]
+    # 원본 문자열은 업로드 bytes에서 필요할 때 다시 읽는다 (object 배열보다 훨씬 작다)
+    return register_list(values, source=read, source_nbytes=len(data))
+
+def get_list(handle: str) -> Optional[IdList]:
+    return _REGISTRY.get(handle)
+
+def drop_list(handle: str) -> None:
+    _REGISTRY.drop(handle)
+
+def require_list(handle: str) -> IdList:
+    lst = get_list(handle)
+    if lst is None:
+        raise KeyError(f"unknown id list: {handle}")
+    return lst
+
+def semi_join(df: pd.DataFrame, col: str, handle: str) -> pd.DataFrame:
+    return df[require_list(handle).mask(df[col])]
+
+def anti_join(df: pd.DataFrame, col: str, handle: str) -> pd.DataFrame:
+    return df[~require_list(handle).mask(df[col])]
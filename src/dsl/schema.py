@@ -1,13 +1,19 @@
 
-from pydantic import BaseModel, Field, field_validator
+import re
+from pydantic import BaseModel, Field, field_validator, model_validator
 from typing import Literal, List, Optional, Any
 
-Op = Literal["=", "!=", ">", ">=", "<", "<=", "IN", "BETWEEN"]
+from src.dsl.lists import HANDLE_RE
+
+Op = Literal["=", "!=", ">", ">=", "<", "<=", "IN", "BETWEEN", "IN_LIST", "NOT_IN_LIST"]
+# 대상/제외 명단: value는 명단 값이 아니라 register_list()가 돌려준 핸들
+ListOps = {"IN_LIST", "NOT_IN_LIST"}
 
 AllowedFields = {
     "users": {"user_id","name","age","gender","region","signup_dt","is_employee","is_test_user","segment"},
     "transactions": {"user_id","event_id","amount","txn_dt","product_code","channel"}
 }
+_AllowedFieldSet = frozenset().union(*AllowedFields.values())
 
 class Filter(BaseModel):
     field: str
@@ -17,11 +23,17 @@ class Filter(BaseModel):
     @field_validator("field")
     @classmethod
     def field_whitelist(cls, v):
-        allowed = set().union(*AllowedFields.values())
-        if v not in allowed:
+        if v not in _AllowedFieldSet:
             raise ValueError(f"field not allowed: {v}")
         return v
 
+    @model_validator(mode="after")
+    def list_handle(self):
+        # 핸들 형식만 검사 (명단 크기와 무관하게 O(1), SQL 임시 테이블명으로 쓰이므로 엄격히)
+        if self.op in ListOps and not (isinstance(self.value, str) and re.fullmatch(HANDLE_RE, self.value)):
+            raise ValueError(f"{self.op} expects an id list handle, got {type(self.value).__name__}")
+        return self
+
 class Join(BaseModel):
     with_: Literal["transactions"] = Field(alias="with")
     on: str = "users.user_id = transactions.user_id"
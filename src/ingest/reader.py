@@ -0,0 +1,203 @@
+from __future__ import annotations
+import io, multiprocessing, os, tempfile, threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+# 업로드 파일(bytes) 읽기: 헤더만 먼저 읽고, 조건/가중치 설정이 참조하는 칼럼만 로드한다.
+# xlsx는 openpyxl read_only 모드로 행 단위 스트리밍 (워크북 전체를 메모리에 올리지 않음).
+Progress = Callable[..., None]
+
+# xlsx는 행 단위 파싱이 느려서(수천 행/초) csv 청크보다 자주 진행률을 보고해야 취소가 바로 먹힌다
+XLSX_PROGRESS_ROWS = 1_000
+# read_tables: xlsx 합계가 이 크기 이상일 때만 프로세스 풀 사용 (spawn 기동 비용 ~1-2초보다 파싱이 길 때)
+PROCESS_MIN_BYTES = int(float(os.environ.get("CHOOCHUM_XLSX_PROCESS_MB", "8")) * 1024 * 1024)
+
+def _is_xlsx(name: str) -> bool:
+    return name.lower().endswith((".xlsx", ".xlsm"))
+
+def _is_csv(name: str) -> bool:
+    return name.lower().endswith(".csv")
+
+def _header_names(row: Sequence[Any]) -> List[str]:
+    # pandas.read_excel과 같은 규칙: 빈 칸은 "Unnamed: i", 중복은 ".n" 접미사
+    names, seen = [], {}
+    for i, v in enumerate(row):
+        name = f"Unnamed: {i}" if v is None or str(v).strip() == "" else str(v)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+def _open_sheet(data: bytes, sheet: Optional[str] = None):
+    from openpyxl import load_workbook
+    wb = load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+    return wb, (wb[sheet] if sheet is not None else wb.worksheets[0])
+
+def sheet_names(data: bytes, name: str) -> List[Optional[str]]:
+    if not _is_xlsx(name):
+        return [None]
+    from openpyxl import load_workbook
+    wb = load_workbook(io.BytesIO(data), read_only=True)
+    try:
+        return list(wb.sheetnames)
+    finally:
+        wb.close()
+
+def read_header(data: bytes, name: str, sheet: Optional[str] = None) -> List[str]:
+    if _is_csv(name):
+        return [str(c) for c in pd.read_csv(io.BytesIO(data), nrows=0).columns]
+    if not _is_xlsx(name):
+        return [str(c) for c in pd.read_excel(io.BytesIO(data), sheet_name=sheet or 0, nrows=0).columns]
+    wb, ws = _open_sheet(data, sheet)
+    try:
+        first = next(ws.iter_rows(max_row=1, values_only=True), ())
+        return _header_names(first)
+    finally:
+        wb.close()
+
+def _apply_dtypes(df: pd.DataFrame, dtypes: Optional[Dict[str, Any]]) -> pd.DataFrame:
+    for col, dtype in (dtypes or {}).items():
+        if col not in df.columns:
+            continue
+        if dtype is str:
+            # 결측은 'None'/'nan' 문자열이 되지 않도록 유지
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+        else:
+            df[col] = df[col].astype(dtype)
+    return df
+
+def _read_xlsx(data: bytes, usecols: Optional[Iterable[str]], dtypes: Optional[Dict[str, Any]],
+               sheet: Optional[str], progress: Optional[Progress], chunk_rows: int,
+               nrows: Optional[int] = None) -> pd.DataFrame:
+    wb, ws = _open_sheet(data, sheet)
+    try:
+        rows = ws.iter_rows(values_only=True)
+        header = _header_names(next(rows, ()))
+        wanted = set(usecols) if usecols is not None else None
+        picks = [(i, c) for i, c in enumerate(header) if wanted is None or c in wanted]
+        cols: Dict[str, list] = {c: [] for _, c in picks}
+        total = (ws.max_row or 0) - 1
+        kept = 0
+        for n, row in enumerate(rows, start=1):
+            if nrows is not None and kept >= nrows:
+                break
+            if not any(v is not None for v in row):
+                continue
+            kept += 1
+            for i, c in picks:
+                cols[c].append(row[i] if i < len(row) else None)
+            if progress and n % chunk_rows == 0:
+                progress(n, total if total > 0 else None, f"{n}행")
+    finally:
+        wb.close()
+    return _apply_dtypes(pd.DataFrame(cols, columns=[c for _, c in picks]), dtypes)
+
+def read_table(data: bytes, name: str, usecols: Optional[Iterable[str]] = None,
+               dtypes: Optional[Dict[str, Any]] = None, sheet: Optional[str] = None,
+               progress: Optional[Progress] = None, chunk_rows: int = 100_000,
+               nrows: Optional[int] = None) -> pd.DataFrame:
+    """usecols: 로드할 칼럼명(None이면 전체), dtypes: {칼럼: dtype} (str이면 결측 유지 문자열),
+    nrows: 앞에서부터 읽을 행 수 (칼럼 자동 감지용 샘플)"""
+    usecols = list(usecols) if usecols is not None else None
+    if _is_xlsx(name):
+        return _read_xlsx(data, usecols, dtypes, sheet, progress, min(chunk_rows, XLSX_PROGRESS_ROWS), nrows)
+    if not _is_csv(name):
+        # .xls 등 openpyxl이 못 읽는 형식
+        df = pd.read_excel(io.BytesIO(data), sheet_name=sheet or 0, usecols=usecols, nrows=nrows)
+        return _apply_dtypes(df, dtypes)
+    if nrows is not None:
+        return _apply_dtypes(pd.read_csv(io.BytesIO(data), usecols=usecols, nrows=nrows), dtypes)
+    buf = io.BytesIO(data)
+    csv_dtypes = {c: ("object" if t is str else t) for c, t in (dtypes or {}).items()
+                  if usecols is None or c in usecols}
+    chunks = []
+    for chunk in pd.read_csv(buf, usecols=usecols, dtype=csv_dtypes or None, chunksize=chunk_rows):
+        chunks.append(chunk)
+        if progress:
+            progress(buf.tell(), len(data), f"{sum(len(c) for c in chunks)}행")
+    return pd.concat(chunks, ignore_index=True)
+
+def _read_one(name: str, src: bytes | str, sheet: Optional[str], usecols: Optional[List[str]],
+              dtypes: Optional[Dict[str, Any]]) -> pd.DataFrame:
+    # src: 파일 내용(bytes) 또는 임시 파일 경로 (프로세스 풀에서 시트마다 워크북 bytes를 피클링하지 않도록)
+    if isinstance(src, str):
+        with open(src, "rb") as f:
+            src = f.read()
+    cols = None
+    if usecols is not None:
+        header = read_header(src, name, sheet)
+        cols = [c for c in header if c in set(usecols)]
+    return read_table(src, name, usecols=cols, dtypes=dtypes, sheet=sheet)
+
+_PROC_POOL: Optional[ProcessPoolExecutor] = None
+_PROC_LOCK = threading.Lock()
+
+def _process_pool(workers: int) -> ProcessPoolExecutor:
+    # 호출마다 spawn하지 않도록 서버 프로세스 전체에서 하나를 재사용 (Streamlit 서버는 멀티스레드라 fork 대신 spawn)
+    global _PROC_POOL
+    with _PROC_LOCK:
+        if _PROC_POOL is None:
+            _PROC_POOL = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return _PROC_POOL
+
+def _drop_process_pool(pool: ProcessPoolExecutor) -> None:
+    global _PROC_POOL
+    with _PROC_LOCK:
+        if _PROC_POOL is pool:
+            _PROC_POOL = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def read_tables(sources: Sequence[Tuple[str, bytes, Optional[str]]], usecols: Optional[Iterable[str]] = None,
+                dtypes: Optional[Dict[str, Any]] = None, max_workers: int = 4,
+                progress: Optional[Progress] = None) -> Dict[Tuple[str, Optional[str]], pd.DataFrame]:
+    """여러 파일/시트를 병렬로 읽는다. sources: [(파일명, bytes, 시트명|None), ...]
+    반환: {(파일명, 시트명): DataFrame}. 헤더에 없는 usecols 칼럼은 무시.
+    openpyxl 파싱은 순수 파이썬(GIL)이라 xlsx가 2개 이상이고 합계가 PROCESS_MIN_BYTES 이상이면
+    공유 프로세스 풀, 아니면 스레드 풀."""
+    usecols = list(usecols) if usecols is not None else None
+    workers = max(1, min(max_workers, len(sources), os.cpu_count() or 1))
+    xlsx = [data for name, data, _ in sources if _is_xlsx(name)]
+    # 같은 워크북의 시트들은 bytes 객체를 공유하므로 id로 묶어 파일당 한 번만 쓴다
+    xlsx_bytes = sum(len(d) for d in {id(d): d for d in xlsx}.values())
+    use_procs = len(xlsx) > 1 and workers > 1 and xlsx_bytes >= PROCESS_MIN_BYTES
+    paths: Dict[int, str] = {}
+    ex = _process_pool(workers) if use_procs else ThreadPoolExecutor(max_workers=workers)
+    out = {}
+    try:
+        futs = {}
+        for name, data, sheet in sources:
+            src: bytes | str = data
+            if use_procs and _is_xlsx(name):
+                if id(data) not in paths:
+                    with tempfile.NamedTemporaryFile(suffix=".xlsx", delete=False) as f:
+                        f.write(data)
+                    paths[id(data)] = f.name
+                src = paths[id(data)]
+            futs[ex.submit(_read_one, name, src, sheet, usecols, dtypes)] = (name, sheet)
+        try:
+            for done, fut in enumerate(as_completed(futs), start=1):
+                out[futs[fut]] = fut.result()
+                if progress:
+                    progress(done, len(futs), futs[fut][0])
+        except BrokenProcessPool:
+            _drop_process_pool(ex)
+            raise
+        except BaseException:
+            for fut in futs:
+                fut.cancel()
+            raise
+    finally:
+        if not use_procs:
+            ex.shutdown(wait=False, cancel_futures=True)
+        for path in paths.values():
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+    return out
@@ -0,0 +1,145 @@
+from __future__ import annotations
+import os, threading, time, uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+class JobCancelled(Exception):
+    pass
+
+class JobLimitExceeded(RuntimeError):
+    pass
+
+class Job:
+    def __init__(self, name: str, owner: Optional[str] = None, idle: Optional[float] = None):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.owner = owner
+        self.status = "pending"  # pending | running | done | failed | cancelled
+        self.progress = 0.0
+        self.message = ""
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.created = time.time()
+        self.finished_at: Optional[float] = None
+        # 소유 세션이 idle초 넘게 폴링(touch)하지 않으면 버려진 작업으로 보고 다음 check에서 취소
+        self.idle = idle
+        self.last_seen = self.created
+        self._cancel = threading.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed", "cancelled")
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    def touch(self) -> None:
+        self.last_seen = time.time()
+
+    def check(self) -> None:
+        if self.idle and self.owner is not None and time.time() - self.last_seen > self.idle:
+            self._cancel.set()
+        if self._cancel.is_set():
+            raise JobCancelled(self.name)
+
+    def report(self, done: float, total: Optional[float] = None, message: Optional[str] = None) -> None:
+        # 작업 함수의 progress 콜백으로 넘겨 쓴다. 취소 요청이 있으면 여기서 중단
+        if total:
+            self.progress = min(max(done / total, 0.0), 1.0)
+        if message is not None:
+            self.message = message
+        self.check()
+
+class JobPool:
+    def __init__(self, max_workers: int = 4, ttl: float = 600.0, per_owner: Optional[int] = 2,
+                 idle: Optional[float] = 60.0):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="choochum-job")
+        self._jobs: Dict[str, Job] = {}
+        # 소유자별 실행 중(대기 포함) 작업 수. forget()으로 목록에서 빠졌어도 스레드가 끝날 때까지 센다
+        self._active: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        # 결과를 가져가면 forget()으로 바로 제거. 가져가지 않은 작업(종료된 세션 등)은 끝난 뒤 ttl초가 지나면 제거
+        self.ttl = ttl
+        # 한 세션이 공유 워커를 독차지하지 못하도록 소유자별 동시 작업 수 제한
+        self.per_owner = per_owner
+        self.idle = idle
+
+    def _prune(self) -> None:
+        now = time.time()
+        for job_id in [i for i, j in self._jobs.items()
+                       if j.finished_at is not None and now - j.finished_at > self.ttl]:
+            del self._jobs[job_id]
+
+    def submit(self, name: str, fn: Callable[..., Any], *args, owner: Optional[str] = None, **kwargs) -> Job:
+        """fn은 progress=job.report 키워드를 받아 청크마다 진행률을 보고해야 취소가 가능하다."""
+        job = Job(name, owner=owner, idle=self.idle)
+        with self._lock:
+            self._prune()
+            if owner is not None:
+                if self.per_owner and self._active.get(owner, 0) >= self.per_owner:
+                    raise JobLimitExceeded(owner)
+                self._active[owner] = self._active.get(owner, 0) + 1
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job: Job, fn, args, kwargs) -> None:
+        try:
+            job.check()
+            job.status = "running"
+            job.result = fn(*args, progress=job.report, **kwargs)
+            job.progress = 1.0
+            job.status = "done"
+        except JobCancelled:
+            job.status = "cancelled"
+        except Exception as e:
+            job.error = e
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+            if job.owner is not None:
+                with self._lock:
+                    left = self._active.get(job.owner, 1) - 1
+                    if left > 0:
+                        self._active[job.owner] = left
+                    else:
+                        self._active.pop(job.owner, None)
+
+    def get(self, job_id: Optional[str]) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id) if job_id else None
+
+    def jobs(self, owner: Optional[str] = None) -> List[Job]:
+        with self._lock:
+            self._prune()
+            return [j for j in self._jobs.values() if owner is None or j.owner == owner]
+
+    def cancel(self, job_id: Optional[str]) -> None:
+        job = self.get(job_id)
+        if job is not None:
+            job.cancel()
+
+    def forget(self, job_id: Optional[str]) -> None:
+        with self._lock:
+            job = self._jobs.pop(job_id, None) if job_id else None
+        if job is not None:
+            job.cancel()
+
+    def shutdown(self) -> None:
+        for job in self.jobs():
+            job.cancel()
+        self._executor.shutdown(wait=False)
+
+_POOL: Optional[JobPool] = None
+_POOL_LOCK = threading.Lock()
+
+def get_pool() -> JobPool:
+    # 프로세스 전체(여러 사용자 세션)가 공유하는 워커 풀. 크기는 CHOOCHUM_WORKERS (기본 4)
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = JobPool(max_workers=int(os.environ.get("CHOOCHUM_WORKERS", "4")),
+                            ttl=float(os.environ.get("CHOOCHUM_JOB_TTL", "600")),
+                            per_owner=int(os.environ.get("CHOOCHUM_JOBS_PER_SESSION", "2")),
+                            idle=float(os.environ.get("CHOOCHUM_JOB_IDLE", "60")))
+        return _POOL
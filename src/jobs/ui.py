@@ -0,0 +1,105 @@
+from __future__ import annotations
+import time, uuid
+from typing import Any, Callable, Hashable, Optional
+
+import streamlit as st
+
+from src.jobs.pool import Job, JobLimitExceeded, get_pool
+
+def session_owner() -> str:
+    if '_job_owner' not in st.session_state:
+        st.session_state['_job_owner'] = uuid.uuid4().hex
+    return st.session_state['_job_owner']
+
+def _jobs() -> dict:
+    return st.session_state.setdefault('_jobs', {})
+
+def _wait(stage: str, job: Job, poll: float) -> None:
+    # 진행 중: 진행률/취소 버튼을 그리고 다시 rerun (이 아래는 그려지지 않음)
+    st.progress(job.progress, text=f'{stage} 진행 중… {job.message}'.strip())
+    if st.button('취소', key=f'_cancel_{stage}'):
+        job.cancel()
+    time.sleep(poll)
+    st.rerun()
+
+def _busy(stage: str) -> None:
+    st.warning(f'{stage}: 이 세션에서 이미 실행 중인 작업이 있습니다. 끝난 뒤 다시 시도하세요.')
+
+def _report_failure(stage: str, job: Job) -> None:
+    if job.status == 'failed':
+        st.error(f'{stage} 실패: {job.error}')
+    else:
+        st.warning(f'{stage} 작업이 취소되었습니다.')
+
+def start_job(stage: str, fn: Callable[..., Any], *args, **kwargs) -> None:
+    """버튼 클릭 시 호출: 같은 stage의 이전 작업은 취소하고 항상 새 작업을 제출한다."""
+    clear_job(stage)
+    try:
+        job = get_pool().submit(stage, fn, *args, owner=session_owner(), **kwargs)
+    except JobLimitExceeded:
+        _busy(stage)
+        return
+    _jobs()[stage] = (None, job.id)
+
+def poll_job(stage: str, poll: float = 0.3) -> Any:
+    """start_job으로 제출한 작업의 결과를 한 번만 반환한다 (받은 뒤에는 세션/풀에서 제거).
+    작업이 없거나 실패/취소면 None, 진행 중이면 진행률을 그리고 rerun."""
+    prev = _jobs().get(stage)
+    job = get_pool().get(prev[1]) if prev else None
+    if job is None:
+        _jobs().pop(stage, None)
+        return None
+    job.touch()  # 폴링이 끊기면(세션 종료) 풀이 idle 시간 뒤 작업을 취소
+    if not job.finished:
+        _wait(stage, job, poll)
+    clear_job(stage)
+    if job.status == 'done':
+        return job.result
+    _report_failure(stage, job)
+    return None
+
+def run_job(stage: str, key: Hashable, fn: Callable[..., Any], *args, poll: float = 0.3, **kwargs) -> Any:
+    """입력(key)에 따라 자동으로 실행되는 단계용 (예: 파일 읽기).
+    같은 key면 세션에 보관한 결과를 재사용하고, key가 바뀌면 이전 작업을 버리고 새로 제출한다.
+    완료된 결과는 세션으로 옮기고 풀에서는 제거한다. 실패/취소면 None."""
+    results = st.session_state.setdefault('_job_results', {})
+    if stage in results and results[stage][0] == key:
+        return results[stage][1]
+    results.pop(stage, None)
+    pool = get_pool()
+    prev = _jobs().get(stage)
+    job = pool.get(prev[1]) if prev and prev[0] == key else None
+    if job is None:
+        if prev:
+            pool.forget(prev[1])
+            _jobs().pop(stage, None)
+        try:
+            job = pool.submit(stage, fn, *args, owner=session_owner(), **kwargs)
+        except JobLimitExceeded:
+            # 취소된 이전 작업이 아직 끝나지 않았을 수 있으므로 잠시 뒤 다시 제출
+            _busy(stage)
+            time.sleep(poll)
+            st.rerun()
+        _jobs()[stage] = (key, job.id)
+
+    job.touch()
+    if not job.finished:
+        _wait(stage, job, poll)
+    if job.status == 'done':
+        results[stage] = (key, job.result)
+        clear_job(stage)
+        return job.result
+    _report_failure(stage, job)
+    if st.button('다시 실행', key=f'_retry_{stage}'):
+        clear_job(stage)
+        st.rerun()
+    return None
+
+def clear_job(stage: str) -> None:
+    prev = _jobs().pop(stage, None)
+    if prev:
+        get_pool().forget(prev[1])
+
+def clear_result(stage: str) -> None:
+    # run_job이 세션에 보관한 결과를 버려 다음 호출에서 다시 실행되게 한다
+    st.session_state.get('_job_results', {}).pop(stage, None)
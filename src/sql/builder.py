@@ -1,11 +1,35 @@
 
 from typing import List, Tuple, Any
 from src.dsl.schema import QueryDSL, Filter
+from src.dsl.lists import HANDLE_PREFIX, require_list
+
+def list_table(handle: str) -> str:
+    return "tmp_" + handle[len(HANDLE_PREFIX):]
+
+def list_tables(dsl: QueryDSL) -> List[Tuple[str, str]]:
+    """명단 필터가 참조하는 임시 테이블 (이름, DDL). 실행 전에 생성 후 IdList.values()를 COPY로 적재"""
+    out = []
+    for f in dsl.filters:
+        if f.op in ("IN_LIST", "NOT_IN_LIST"):
+            name = list_table(f.value)
+            if any(n == name for n, _ in out):
+                continue
+            col_type = "BIGINT" if require_list(f.value).kind == "int" else "TEXT"
+            out.append((name, f"CREATE TEMP TABLE IF NOT EXISTS {name} (id {col_type} PRIMARY KEY) ON COMMIT DROP"))
+    return out
 
 def to_sql(dsl: QueryDSL) -> Tuple[str, List[Any]]:
     where_clauses, params = [], []
-    for f in dsl.filters:
-        if f.op == "IN":
+    list_joins = []
+    for i, f in enumerate(dsl.filters):
+        if f.op == "IN_LIST":
+            # semi-join: 임시 테이블 PK라 중복 행이 생기지 않음
+            t = list_table(f.value)
+            list_joins.append(f" JOIN {t} l{i} ON l{i}.id = u.{f.field}")
+        elif f.op == "NOT_IN_LIST":
+            t = list_table(f.value)
+            where_clauses.append(f"NOT EXISTS (SELECT 1 FROM {t} l{i} WHERE l{i}.id = u.{f.field})")
+        elif f.op == "IN":
             where_clauses.append(f"u.{f.field} = ANY(%s)")
             params.append(list(f.value))
         else:
@@ -19,7 +43,7 @@ def to_sql(dsl: QueryDSL) -> Tuple[str, List[Any]]:
         join_sql = ' JOIN transactions tx ON u.user_id = tx.user_id'
         # 실제 파라미터 바인딩/aggregation/having은 단순화 (미리보기 용도)
     base = 'SELECT u.user_id, u.segment FROM users u'
-    sql = f"""{base}{join_sql}
+    sql = f"""{base}{''.join(list_joins)}{join_sql}
 WHERE {' AND '.join(where_clauses) if where_clauses else 'TRUE'}
 {group_by}"""
     return sql, params
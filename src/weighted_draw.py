@@ -1,15 +1,29 @@
 from __future__ import annotations
 import numpy as np
 import pandas as pd
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
-def apply_eligibility(df: pd.DataFrame, expressions: List[str]) -> pd.DataFrame:
+from src.cache.bitmap import BitmapCache, evaluate_predicates
+
+def _eval_bool(df: pd.DataFrame, expr: str) -> pd.Series:
+    # query()와 같이 불리언 결과만 허용 (캐시 경로에서 bool 캐스팅으로 조용히 통과하지 않도록)
+    out = df.eval(expr)
+    if not (isinstance(out, pd.Series) and pd.api.types.is_bool_dtype(out)):
+        raise ValueError(f"eligibility expression must evaluate to boolean: {expr!r}")
+    return out
+
+def apply_eligibility(df: pd.DataFrame, expressions: List[str],
+                      cache: Optional[BitmapCache] = None, dataset: Optional[str] = None) -> pd.DataFrame:
     if not expressions:
         return df
-    out = df.copy()
-    for expr in expressions:
-        out = out.query(expr)
-    return out
+    if cache is None:
+        out = df.copy()
+        for expr in expressions:
+            out = out.query(expr)
+        return out
+    # 식마다 전체 테이블 기준 마스크를 캐시하고, 바뀐 식만 다시 계산
+    preds = {("query", expr): (lambda d, e=expr: _eval_bool(d, e)) for expr in expressions}
+    return df[evaluate_predicates(df, preds, cache=cache, dataset=dataset)].copy()
 
 def factor_categorical(series: pd.Series, mapping: Dict[str, float], default: float) -> np.ndarray:
     return series.map(mapping).fillna(default).astype(float).to_numpy()
@@ -61,10 +75,122 @@ def draw_winners(df_weighted: pd.DataFrame, n_winners: int, unique_key: str, see
     idx = rng.choice(len(base), size=n, replace=False, p=probs)
     return base.iloc[idx].copy()
 
-def run_raffle(df: pd.DataFrame, config: Dict[str, Any], n_winners: int, seed: int | None = None):
+REST = "나머지"
+
+QUOTA_MODES = ("count", "proportion", "cap")
+
+def quota_mode(quotas: Dict[Any, float] | int, mode: str | None = None) -> str:
+    # count: 그룹별 인원수, proportion: n_winners에 대한 비율, cap: 모든 그룹 공통 상한(정수 하나).
+    # mode를 생략하면 정수 하나 -> cap, 값이 모두 정수형 -> count, 합이 1인 실수 -> proportion
+    # ({"서울": 1.0}은 비율 100%). 그 밖의 실수는 모호하므로 mode를 명시해야 한다.
+    is_cap = isinstance(quotas, (int, np.integer))
+    if mode is not None:
+        if mode not in QUOTA_MODES:
+            raise ValueError(f"quota mode must be one of {QUOTA_MODES}, got {mode!r}")
+        if (mode == "cap") != is_cap:
+            raise ValueError("cap mode takes a single integer; count/proportion modes take a dict")
+        return mode
+    if is_cap:
+        return "cap"
+    values = list(dict(quotas).values())
+    if all(isinstance(q, (int, np.integer)) for q in values):
+        return "count"
+    if np.isclose(sum(float(q) for q in values), 1.0):
+        return "proportion"
+    if all(float(q).is_integer() for q in values):
+        return "count"  # YAML/JSON에서 40.0처럼 읽힌 인원수
+    raise ValueError("ambiguous quotas: set quota mode to 'count' or 'proportion'")
+
+def resolve_quotas(groups: pd.Series, quotas: Dict[Any, float] | int, n_winners: int | None = None,
+                   mode: str | None = None) -> Dict[Any, int]:
+    # 모드는 quota_mode 참고. REST("나머지") 키는 명시되지 않은 그룹 전체를 한 층으로 묶는다.
+    # 인원수/비율 모드는 n_winners가 주어지면 합계가 n_winners와 같아야 한다.
+    mode = quota_mode(quotas, mode)
+    if mode == "cap":
+        return {g: int(quotas) for g in pd.unique(groups.dropna())}
+    quotas = dict(quotas)
+    if any(q < 0 for q in quotas.values()):
+        raise ValueError("quotas must be non-negative")
+    if mode == "proportion":
+        if n_winners is None:
+            raise ValueError("proportional quotas require n_winners")
+        raw = {g: float(q) * n_winners for g, q in quotas.items()}
+        counts = {g: int(np.floor(v)) for g, v in raw.items()}
+        # 최대 잔여(largest remainder) 방식으로 반올림 오차 배분
+        short = int(round(sum(raw.values()))) - sum(counts.values())
+        for g in sorted(raw, key=lambda g: raw[g] - counts[g], reverse=True)[:max(short, 0)]:
+            counts[g] += 1
+    else:
+        if any(not float(q).is_integer() for q in quotas.values()):
+            raise ValueError("count quotas must be whole numbers")
+        counts = {g: int(q) for g, q in quotas.items()}
+    if n_winners is not None and sum(counts.values()) != n_winners:
+        raise ValueError(f"quotas sum to {sum(counts.values())}, expected n_winners={n_winners}")
+    return counts
+
+def draw_quota(df_weighted: pd.DataFrame, by: str, quotas: Dict[Any, float] | int, unique_key: str,
+               n_winners: int | None = None, seed: int | None = None, mode: str | None = None) -> pd.DataFrame:
+    if unique_key not in df_weighted.columns:
+        raise ValueError(f"unique_key '{unique_key}' column not found")
+    if by not in df_weighted.columns:
+        raise ValueError(f"quota column '{by}' not found")
+
+    base = df_weighted.drop_duplicates(subset=[unique_key], keep="last").reset_index(drop=True)
+    weights = base["___weight"].to_numpy(dtype=float)
+    if len(base) and np.all(weights <= 0):
+        raise ValueError("All weights are non-positive")
+
+    mode = quota_mode(quotas, mode)
+    resolved = resolve_quotas(base[by], quotas, n_winners, mode)
+    groups = base[by].astype(object)
+    explicit = groups.isin([g for g in resolved if g != REST])
+    strata = groups.where(explicit, REST) if REST in resolved else groups.where(explicit)
+    codes, uniques = pd.factorize(strata)  # 쿼터 밖 그룹은 -1
+    limit = np.append(np.array([resolved[u] for u in uniques], dtype=int), 0)
+
+    # 가중 랜덤 키를 한 번만 뽑고(Exp(1)/w, 작을수록 우선) 층별 top-k
+    rng = np.random.default_rng(seed)
+    keys = np.full(len(base), np.inf)
+    pos = weights > 0
+    keys[pos] = rng.exponential(size=len(base))[pos] / weights[pos]
+    order = np.lexsort((keys, codes))
+    sorted_codes = codes[order]
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    rank = np.arange(len(order)) - np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+    keep = np.flatnonzero((sorted_codes >= 0) & (rank < limit[sorted_codes]) & np.isfinite(keys[order]))
+    if mode == "cap" and n_winners is not None and len(keep) > n_winners:
+        # 상한 모드: 층별 상한 안에서 전체 키 순으로 n_winners명
+        keep = np.sort(keep[np.argsort(keys[order[keep]], kind="stable")[:n_winners]])
+    out = base.iloc[order[keep]].copy()
+    out["___stratum"] = strata.iloc[order[keep]].to_numpy()
+    return out
+
+def quota_summary(by: str, quotas: Dict[Any, float] | int, winners: pd.DataFrame,
+                  requested: Dict[Any, int] | None = None) -> Dict[str, Any]:
+    # 감사 로그용: 요청 인원(상한 모드면 cap)과 실제 층별 당첨 인원
+    actual = winners["___stratum"].value_counts().to_dict()
+    if isinstance(quotas, (int, np.integer)):
+        return {"by": by, "cap": int(quotas), "requested": {}, "actual": {k: int(v) for k, v in actual.items()}}
+    requested = requested or {}
+    merged = {g: int(actual.get(g, 0)) for g in requested}
+    merged.update({k: int(v) for k, v in actual.items() if k not in merged})
+    return {"by": by, "cap": None, "requested": dict(requested), "actual": merged}
+
+def run_raffle(df: pd.DataFrame, config: Dict[str, Any], n_winners: int, seed: int | None = None,
+               cache: Optional[BitmapCache] = None, dataset: Optional[str] = None):
     eli_exprs = config.get("eligibility", [])
-    df_eli = apply_eligibility(df, eli_exprs)
+    df_eli = apply_eligibility(df, eli_exprs, cache=cache, dataset=dataset)
     df_w = compute_weights(df_eli, config)
     unique_key = config.get("unique_key", "고객ID")
+    quota = config.get("quota")
+    if quota:
+        mode = quota_mode(quota["quotas"], quota.get("mode"))
+        winners = draw_quota(df_w, quota["by"], quota["quotas"], unique_key=unique_key,
+                             n_winners=n_winners, seed=seed, mode=mode)
+        requested = None
+        if mode != "cap":
+            requested = resolve_quotas(df_w[quota["by"]], quota["quotas"], n_winners, mode)
+        return {"eligible": df_eli, "weighted": df_w, "winners": winners,
+                "quotas": quota_summary(quota["by"], quota["quotas"], winners, requested)}
     winners = draw_winners(df_w, n_winners, unique_key=unique_key, seed=seed)
     return {"eligible": df_eli, "weighted": df_w, "winners": winners}
@@ -0,0 +1,9 @@
+import json
+from src.audit.logger import write_audit
+
+def test_write_audit_records_quotas(tmp_path):
+    quotas = {"by": "거주지역", "cap": None, "requested": {"서울": 40, "경기": 30}, "actual": {"서울": 25, "경기": 30}}
+    path = write_audit("ev1", 42, {}, "", "abc", outdir=str(tmp_path), quotas=quotas)
+    rec = json.load(open(path, encoding="utf-8"))
+    assert rec["quotas"] == quotas
+    assert "quotas" not in json.load(open(write_audit("ev2", 1, {}, "", "abc", outdir=str(tmp_path / "b")), encoding="utf-8"))
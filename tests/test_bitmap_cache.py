@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+from src.cache.bitmap import BitmapCache
+from src.weighted_draw import apply_eligibility
+
+def test_cached_eligibility_matches_query():
+    df = pd.DataFrame({"나이": range(10, 60), "점수": [i % 7 for i in range(50)]})
+    exprs = ["나이 >= 19", "점수 > 2"]
+    cache = BitmapCache()
+    out = apply_eligibility(df, exprs, cache=cache, dataset="d1")
+    assert out.equals(apply_eligibility(df, exprs))
+    assert len(cache) == 2 and cache.misses == 2
+
+    # 조건 하나만 바뀌면 나머지는 캐시 적중
+    apply_eligibility(df, ["나이 >= 19", "점수 > 3"], cache=cache, dataset="d1")
+    assert cache.hits == 1 and cache.misses == 3
+
+def test_eviction_respects_budget():
+    n = 80  # 비트맵 하나 = 10 bytes
+    df = pd.DataFrame({"x": np.arange(n)})
+    cache = BitmapCache(max_bytes=25)
+    for t in range(5):
+        cache.mask(df, "d", ("x>", t), lambda d, t=t: d["x"] > t)
+    assert len(cache) == 2 and cache.nbytes <= 25
+    assert cache.get_packed("d", ("x>", 0)) is None
+    assert cache.get_packed("d", ("x>", 4)) is not None
+
+def test_cached_eligibility_rejects_non_boolean():
+    import pytest
+    df = pd.DataFrame({"나이": [0, 20, 30]})
+    with pytest.raises(ValueError):
+        apply_eligibility(df, ["나이"], cache=BitmapCache(), dataset="d")
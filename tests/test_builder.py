@@ -1,3 +1,4 @@
+import pytest
 
 from src.dsl.schema import QueryDSL, Filter
 from src.sql.builder import to_sql
@@ -7,3 +8,21 @@ def test_builder_sql():
     sql, params = to_sql(dsl)
     assert 'FROM users u' in sql
     assert 'region' in sql and params
+
+def test_builder_list_filters():
+    from src.dsl.lists import register_list
+    from src.sql.builder import list_tables
+    inc, exc = register_list(range(100000)), register_list(['a', 'b'])
+    dsl = QueryDSL(filters=[Filter(field='user_id', op='IN_LIST', value=inc),
+                            Filter(field='user_id', op='NOT_IN_LIST', value=exc)])
+    sql, params = to_sql(dsl)
+    assert not params
+    assert f"JOIN tmp_{inc[5:]} l0 ON l0.id = u.user_id" in sql
+    assert f"NOT EXISTS (SELECT 1 FROM tmp_{exc[5:]} l1" in sql
+    ddl = dict(list_tables(dsl))
+    assert 'BIGINT' in ddl[f"tmp_{inc[5:]}"] and 'TEXT' in ddl[f"tmp_{exc[5:]}"]
+    # 레지스트리에서 밀려난 명단은 TEXT로 추측하지 않고 오류
+    from src.dsl.lists import drop_list
+    drop_list(exc)
+    with pytest.raises(KeyError):
+        list_tables(dsl)
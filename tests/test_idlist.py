@@ -0,0 +1,54 @@
+import pandas as pd
+import pytest
+from src.dsl.lists import IdList, register_list, semi_join, anti_join, load_list, get_list
+from src.dsl.schema import Filter
+
+def test_int_coded_list():
+    lst = IdList(["10", "3", "7", "3"])
+    assert lst.kind == "int" and lst.codes.tolist() == [3, 7, 10]
+    assert lst.mask(pd.Series([3, 4, 10])).tolist() == [True, False, True]
+    assert lst.mask(pd.Series(["7", "07", None, "x"])).tolist() == [True, False, False, False]
+
+def test_integral_float_list_is_int_coded():
+    # 결측이 섞여 float로 읽힌 정수 ID 칼럼
+    lst = IdList(pd.Series([1, 2, None]))
+    assert lst.kind == "int" and lst.codes.tolist() == [1, 2]
+    assert lst.mask(pd.Series([1, 2, 3])).tolist() == [True, True, False]
+    assert lst.mask(pd.Series(["1", "3"])).tolist() == [True, False]
+    assert IdList(pd.Series([1.5, None])).kind == "hash"
+
+def test_hashed_list_semi_and_anti_join():
+    handle = register_list(["u001", "u003", " u005 "])
+    assert get_list(handle).kind == "hash"
+    df = pd.DataFrame({"user_id": ["u001", "u002", "u003", "u004", "u005", None]})
+    assert semi_join(df, "user_id", handle)["user_id"].tolist() == ["u001", "u003", "u005"]
+    assert anti_join(df, "user_id", handle)["user_id"].fillna("-").tolist() == ["u002", "u004", "-"]
+
+def test_load_list_from_csv():
+    data = "고객ID\n001\n002\n".encode("utf-8")
+    handle = load_list(data, "ex.csv")
+    assert get_list(handle).kind == "hash" and len(get_list(handle)) == 2
+
+def test_filter_requires_handle():
+    Filter(field="user_id", op="NOT_IN_LIST", value=register_list([1, 2]))
+    with pytest.raises(ValueError):
+        Filter(field="user_id", op="IN_LIST", value=[1, 2])
+    with pytest.raises(ValueError):
+        Filter(field="user_id", op="IN_LIST", value="list:x; DROP TABLE users")
+
+def test_registry_evicts_by_budget():
+    from src.dsl.lists import ListRegistry
+    reg = ListRegistry(max_bytes=8 * 150)
+    a, b = IdList(range(100)), IdList(range(100, 200))
+    reg.add(a)
+    reg.add(b)
+    assert reg.get(a.handle) is None and reg.get(b.handle) is b
+    assert reg.nbytes == b.nbytes
+
+def test_hash_list_raw_values_are_rebuilt_lazily():
+    data = "고객ID\nb\na\nb\n".encode("utf-8")
+    lst = get_list(load_list(data, "ids.csv"))
+    assert not hasattr(lst, "raw")
+    assert lst.values().tolist() == ["a", "b"]
+    with pytest.raises(ValueError):
+        IdList(["x", "y"]).values()
@@ -0,0 +1,70 @@
+import io
+import pandas as pd
+from src.ingest.reader import read_header, read_table, read_tables, sheet_names
+
+def _xlsx(frames):
+    buf = io.BytesIO()
+    with pd.ExcelWriter(buf, engine="openpyxl") as w:
+        for sheet, df in frames.items():
+            df.to_excel(w, sheet_name=sheet, index=False)
+    return buf.getvalue()
+
+DF = pd.DataFrame({
+    "user_id": ["001", "002", None, "004"],
+    "region": ["서울", "경기", "부산", "서울"],
+    "amount": [1000, 250000, 5, 7],
+    "memo": ["a", "b", "c", "d"],
+})
+
+def test_projected_xlsx_matches_read_excel():
+    data = _xlsx({"S1": DF})
+    assert read_header(data, "x.xlsx") == list(DF.columns)
+    got = read_table(data, "x.xlsx", usecols=["user_id", "amount"], dtypes={"user_id": str})
+    assert list(got.columns) == ["user_id", "amount"]
+    assert got["user_id"].tolist()[:2] == ["001", "002"] and pd.isna(got["user_id"][2])
+    assert got["amount"].tolist() == DF["amount"].tolist()
+
+def test_projected_csv_and_parallel_sheets():
+    csv = DF.to_csv(index=False).encode("utf-8")
+    got = read_table(csv, "x.csv", usecols=["user_id", "region"], dtypes={"user_id": str}, chunk_rows=2)
+    assert got["user_id"].tolist()[:2] == ["001", "002"] and len(got) == 4
+
+    data = _xlsx({"S1": DF, "S2": DF.head(2)})
+    assert sheet_names(data, "x.xlsx") == ["S1", "S2"]
+    out = read_tables([("x.xlsx", data, "S1"), ("x.xlsx", data, "S2"), ("y.csv", csv, None)],
+                      usecols=["region", "없는칼럼"])
+    assert [len(out[k]) for k in [("x.xlsx", "S1"), ("x.xlsx", "S2"), ("y.csv", None)]] == [4, 2, 4]
+    assert all(list(df.columns) == ["region"] for df in out.values())
+
+def test_sample_rows():
+    data = _xlsx({"S1": DF})
+    csv = DF.to_csv(index=False).encode("utf-8")
+    assert len(read_table(data, "x.xlsx", nrows=2)) == 2
+    assert len(read_table(csv, "x.csv", nrows=3)) == 3
+
+def test_parallel_sheets_in_process_pool(monkeypatch):
+    import os
+    from src.ingest import reader
+    monkeypatch.setattr(reader, "PROCESS_MIN_BYTES", 0)
+    monkeypatch.setattr(os, "cpu_count", lambda: 2)
+    data = _xlsx({"S1": DF, "S2": DF.head(3)})
+    try:
+        out = read_tables([("x.xlsx", data, "S1"), ("x.xlsx", data, "S2")], usecols=["user_id"],
+                          dtypes={"user_id": str})
+        pool = reader._PROC_POOL
+        assert pool is not None
+        # 두 번째 호출은 같은 풀을 재사용
+        again = read_tables([("x.xlsx", data, "S2"), ("x.xlsx", data, "S1")])
+        assert reader._PROC_POOL is pool
+    finally:
+        if reader._PROC_POOL is not None:
+            reader._drop_process_pool(reader._PROC_POOL)
+    assert out[("x.xlsx", "S1")]["user_id"].tolist()[:2] == ["001", "002"]
+    assert len(out[("x.xlsx", "S2")]) == 3 and len(again[("x.xlsx", "S1")]) == 4
+
+def test_xlsx_progress_is_frequent():
+    big = pd.DataFrame({"user_id": range(2500)})
+    data = _xlsx({"S1": big})
+    seen = []
+    read_table(data, "x.xlsx", progress=lambda done, total=None, msg=None: seen.append(done))
+    assert seen == [1000, 2000]
@@ -0,0 +1,81 @@
+import threading, time
+from src.jobs.pool import JobPool, JobLimitExceeded
+
+def _count(n, gate=None, progress=None):
+    for i in range(n):
+        if gate is not None:
+            gate.wait()
+        progress(i + 1, n)
+    return n
+
+def _wait(job, timeout=5.0):
+    end = time.time() + timeout
+    while not job.finished and time.time() < end:
+        time.sleep(0.01)
+
+def test_job_result_and_progress():
+    pool = JobPool(max_workers=2)
+    job = pool.submit("count", _count, 10, owner="a")
+    _wait(job)
+    assert job.status == "done" and job.result == 10 and job.progress == 1.0
+    assert pool.jobs(owner="a") == [job] and pool.jobs(owner="b") == []
+
+def test_job_cancel_between_chunks():
+    pool = JobPool(max_workers=1)
+    gate = threading.Event()
+    job = pool.submit("count", _count, 1000, gate=gate)
+    job.cancel()
+    gate.set()
+    _wait(job)
+    assert job.status == "cancelled" and job.result is None
+
+def test_job_failure_is_captured():
+    pool = JobPool(max_workers=1)
+    job = pool.submit("bad", lambda progress=None: 1 / 0)
+    _wait(job)
+    assert job.status == "failed" and isinstance(job.error, ZeroDivisionError)
+
+def test_finished_jobs_are_evicted():
+    pool = JobPool(max_workers=1, ttl=0.0)
+    job = pool.submit("count", _count, 3)
+    _wait(job)
+    pool.forget(job.id)
+    assert pool.get(job.id) is None
+
+    stale = pool.submit("count", _count, 3)
+    _wait(stale)
+    time.sleep(0.01)
+    assert pool.jobs() == []
+
+def test_per_owner_limit():
+    pool = JobPool(max_workers=4, per_owner=1)
+    gate = threading.Event()
+    job = pool.submit("count", _count, 3, gate=gate, owner="a")
+    try:
+        pool.submit("count", _count, 3, owner="a")
+        assert False, "limit not enforced"
+    except JobLimitExceeded:
+        pass
+    other = pool.submit("count", _count, 3, owner="b")
+    gate.set()
+    _wait(job); _wait(other)
+    assert job.status == "done" and other.status == "done"
+    # 끝난 작업은 한도에서 빠진다
+    again = pool.submit("count", _count, 3, owner="a")
+    _wait(again)
+    assert again.status == "done"
+
+def test_unpolled_job_is_cancelled():
+    pool = JobPool(max_workers=2, idle=0.05)
+    gate = threading.Event()
+    stale = pool.submit("count", _count, 3, gate=gate, owner="a")
+    polled = pool.submit("count", _count, 3, gate=gate, owner="b")
+    end = time.time() + 0.2
+    while time.time() < end:
+        polled.touch()
+        time.sleep(0.01)
+    polled.touch()
+    gate.set()
+    _wait(stale); _wait(polled)
+    assert stale.status == "cancelled"
+    assert polled.status == "done"
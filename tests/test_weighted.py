@@ -1,5 +1,5 @@
 import pandas as pd
-from src.weighted_draw import run_raffle
+from src.weighted_draw import run_raffle, draw_quota, resolve_quotas, quota_mode
 
 def test_weight_bias():
     df = pd.DataFrame({
@@ -17,3 +17,74 @@ def test_weight_bias():
     winners = run_raffle(df, config, n_winners=200, seed=123)["winners"]
     female_rate = (winners["성별"] == "여성").mean()
     assert 0.7 < female_rate < 0.8
+
+def test_quota_draw():
+    df = pd.DataFrame({
+        "고객ID": range(1000),
+        "거주지역": ["서울"]*300 + ["경기"]*300 + ["부산"]*200 + ["대구"]*200
+    })
+    config = {
+        "unique_key": "고객ID",
+        "eligibility": [],
+        "weights": {},
+        "quota": {"by": "거주지역", "quotas": {"서울": 40, "경기": 30, "나머지": 30}}
+    }
+    res = run_raffle(df, config, n_winners=100, seed=7)
+    winners = res["winners"]
+    counts = winners["거주지역"].value_counts()
+    assert counts["서울"] == 40 and counts["경기"] == 30
+    assert counts[["부산", "대구"]].sum() == 30
+    assert winners["고객ID"].is_unique
+    assert res["quotas"]["requested"] == {"서울": 40, "경기": 30, "나머지": 30}
+    assert res["quotas"]["actual"] == {"서울": 40, "경기": 30, "나머지": 30}
+    again = run_raffle(df, config, n_winners=100, seed=7)["winners"]
+    assert winners["고객ID"].tolist() == again["고객ID"].tolist()
+
+def test_quota_proportions_and_cap():
+    groups = pd.Series(["a"]*10 + ["b"]*10 + ["c"]*3)
+    assert resolve_quotas(groups, {"a": 0.5, "b": 0.25, "나머지": 0.25}, n_winners=10) == {"a": 5, "b": 3, "나머지": 2}
+    df = pd.DataFrame({"고객ID": range(23), "seg": groups, "___weight": 1.0})
+    winners = draw_quota(df, "seg", 2, unique_key="고객ID", seed=1)
+    assert winners["seg"].value_counts().to_dict() == {"a": 2, "b": 2, "c": 2}
+    # 상한 모드에서도 n_winners가 전체 인원
+    winners = draw_quota(df, "seg", 2, unique_key="고객ID", n_winners=3, seed=1)
+    assert len(winners) == 3 and winners["seg"].value_counts().max() <= 2
+
+def test_quota_counts_must_match_n_winners():
+    import pytest
+    groups = pd.Series(["a"]*10 + ["b"]*10)
+    with pytest.raises(ValueError):
+        resolve_quotas(groups, {"a": 40, "b": 30}, n_winners=10)
+    with pytest.raises(ValueError):
+        resolve_quotas(groups, {"a": 0.5, "b": 0.25}, n_winners=10)
+
+def test_quota_shortfall_is_reported():
+    df = pd.DataFrame({"고객ID": range(55), "거주지역": ["서울"]*25 + ["경기"]*30})
+    config = {"unique_key": "고객ID", "weights": {},
+              "quota": {"by": "거주지역", "quotas": {"서울": 40, "경기": 30}}}
+    res = run_raffle(df, config, n_winners=70, seed=3)
+    assert res["quotas"]["requested"] == {"서울": 40, "경기": 30}
+    assert res["quotas"]["actual"] == {"서울": 25, "경기": 30}
+
+def test_quota_mode():
+    import pytest
+    groups = pd.Series(["서울"]*20 + ["경기"]*20)
+    # 합이 1인 실수는 비율: 1.0 = 전원 서울
+    assert quota_mode({"서울": 1.0}) == "proportion"
+    assert resolve_quotas(groups, {"서울": 1.0}, n_winners=10) == {"서울": 10}
+    assert quota_mode({"서울": 1}) == "count"
+    assert quota_mode({"서울": 6.0, "경기": 4.0}) == "count"
+    assert quota_mode(3) == "cap"
+    # 명시한 mode가 우선
+    assert resolve_quotas(groups, {"서울": 1.0, "경기": 9.0}, n_winners=10, mode="count") == {"서울": 1, "경기": 9}
+    with pytest.raises(ValueError):
+        quota_mode({"서울": 0.5, "경기": 2.5})
+    with pytest.raises(ValueError):
+        quota_mode({"서울": 3}, mode="cap")
+    with pytest.raises(ValueError):
+        resolve_quotas(groups, {"서울": 0.5, "경기": 0.5}, n_winners=10, mode="count")
+    df = pd.DataFrame({"고객ID": range(40), "거주지역": groups})
+    config = {"unique_key": "고객ID", "weights": {},
+              "quota": {"by": "거주지역", "mode": "proportion", "quotas": {"서울": 1.0}}}
+    res = run_raffle(df, config, n_winners=10, seed=1)
+    assert res["winners"]["거주지역"].tolist() == ["서울"]*10